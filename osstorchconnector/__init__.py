@@ -1,11 +1,15 @@
 from .oss_iterable_dataset import OssIterableDataset
 from .oss_map_dataset import OssMapDataset
+from .oss_mixed_dataset import OssMixedIterableDataset
 from .oss_checkpoint import OssCheckpoint
+from .oss_worker import warmup_worker_init_fn
 from ._oss_bucket_iterable import imagenet_manifest_parser
 
 __all__ = [
     "OssIterableDataset",
     "OssMapDataset",
+    "OssMixedIterableDataset",
     "OssCheckpoint",
     "imagenet_manifest_parser",
+    "warmup_worker_init_fn",
 ]
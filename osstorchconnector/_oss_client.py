@@ -1,6 +1,8 @@
 import os
 from typing import Iterator, Iterable
 import logging
+import threading
+import time
 
 log = logging.getLogger(__name__)
 
@@ -28,18 +30,80 @@ class OssClient:
         self._client_pid = None
         self._id = id
         self._total = total
+        self._warmup_thread = None
+        self._warmup_cost = None
 
     @property
     def _client(self) -> DataSet:
+        if self._warmup_thread is not None and self._warmup_thread is not threading.current_thread():
+            self._warmup_thread.join()
+            self._warmup_thread = None
         if self._client_pid is None or self._client_pid != os.getpid():
             # does OSS client survive forking ? NO
             if self._client_pid != os.getpid() and self._real_client is not None:
                 log.info("OssClient delete dataset")
                 # del self._real_client
             self._client_pid = os.getpid()
+            self._warmup_cost = None
             self._real_client = self._client_builder()
         return self._real_client
 
+    def __getstate__(self):
+        # the native dataset does not survive forking or pickling, only keep the config
+        # so that spawned workers receive a cheap copy and rebuild it on first use
+        state = self.__dict__.copy()
+        state["_real_client"] = None
+        state["_client_pid"] = None
+        state["_warmup_thread"] = None
+        state["_warmup_cost"] = None
+        return state
+
+    def _set_worker(self, id: int, total: int):
+        if self._id != id or self._total != total:
+            log.info("OssClient reset id %d -> %d, total %d -> %d", self._id, id, self._total, total)
+            self._id = id
+            self._total = total
+            self._client_pid = None     # rebuild with new id and total
+
+    def warmup(self, bucket: str = "", prefix: str = "") -> float:
+        """Builds the native client of current process and optionally issues a first request.
+
+        Building the client loads credentials and config, so errors in them are raised early.
+        When bucket is given, one object under prefix is listed to resolve the endpoint and
+        open a first connection. The native client can not be shared with other processes,
+        so warm-up must run in the process which reads the data.
+
+        Args:
+          bucket(str): Optional bucket used for the first request.
+          prefix(str): Prefix listed in the first request.
+
+        Returns:
+            float: Time cost of warm-up in seconds.
+        """
+        start_time = time.time()
+        client = self._client
+        if bucket:
+            next(iter(client.list(bucket, prefix)), None)
+        cost = time.time() - start_time
+        self._warmup_cost = cost
+        log.info("OssClient warmup done, id %d, total %d, bucket: %s, time cost: %.2f s", self._id, self._total, bucket, cost)
+        return cost
+
+    def start_warmup(self, bucket: str = "", prefix: str = ""):
+        """Runs `warmup` in a background thread.
+
+        The first use of the client from another thread waits for the warm-up to finish.
+        """
+        self._warmup_thread = threading.Thread(target=self._warmup_background, args=(bucket, prefix), daemon=True)
+        self._warmup_thread.start()
+
+    def _warmup_background(self, bucket: str, prefix: str):
+        try:
+            self.warmup(bucket, prefix)
+        except Exception as e:
+            log.error("OssClient warmup failed, id %d, total %d, bucket: %s, error: %s", self._id, self._total, bucket, e)
+            self._client_pid = None     # rebuild and raise again on first use
+
     def _client_builder(self) -> DataSet:
         log.info("OssClient new_oss_dataset, id %d, total %d", self._id, self._total)
         return new_oss_dataset(self._endpoint, self._cred_path, self._config_path, str(self._uuid), self._id, self._total)
@@ -6,7 +6,8 @@ import uuid
 import logging
 
 from ._oss_client import OssClient, DataObject
-from ._oss_bucket_iterable import OssBucketIterable, identity
+from ._oss_bucket_iterable import OssBucketIterable, identity, parse_oss_uri
+from .oss_worker import _mark_worker_start, _log_time_to_first_object
 
 log = logging.getLogger(__name__)
 
@@ -24,6 +25,8 @@ class OssIterableDataset(torch.utils.data.IterableDataset):
         config_path: str,
         get_dataset_objects: Callable[[OssClient], Iterable[DataObject]],
         transform: Callable[[DataObject], Any] = identity,
+        warmup_uri: str = "",
+        get_dataset_objects_without_preload: Callable[[OssClient], Iterable[DataObject]] = None,
     ):
         self._uuid = uuid.uuid4()
         self._endpoint = endpoint
@@ -39,7 +42,9 @@ class OssIterableDataset(torch.utils.data.IterableDataset):
         else:
             self._config_path = config_path
         self._get_dataset_objects = get_dataset_objects
+        self._get_dataset_objects_without_preload = get_dataset_objects_without_preload
         self._transform = transform
+        self._warmup_uri = warmup_uri
         self._client = None
 
     @classmethod
@@ -65,8 +70,15 @@ class OssIterableDataset(torch.utils.data.IterableDataset):
             OssIterableDataset: An IterableStyle dataset created from OSS objects.
         """
         log.info(f"Building {cls.__name__} from_objects")
+        if isinstance(object_uris, str):
+            warmup_uri = object_uris
+        elif isinstance(object_uris, (list, tuple)) and object_uris:
+            warmup_uri = object_uris[0]
+        else:
+            warmup_uri = ""
         return cls(
-            endpoint, cred_path, config_path, partial(OssBucketIterable.from_uris, object_uris, preload=True), transform=transform
+            endpoint, cred_path, config_path, partial(OssBucketIterable.from_uris, object_uris, preload=True), transform=transform,
+            warmup_uri=warmup_uri, get_dataset_objects_without_preload=partial(OssBucketIterable.from_uris, object_uris, preload=False)
         )
 
     @classmethod
@@ -93,7 +105,8 @@ class OssIterableDataset(torch.utils.data.IterableDataset):
         """
         log.info(f"Building {cls.__name__} from_prefix")
         return cls(
-            endpoint, cred_path, config_path, partial(OssBucketIterable.from_prefix, oss_uri, preload=True), transform=transform
+            endpoint, cred_path, config_path, partial(OssBucketIterable.from_prefix, oss_uri, preload=True), transform=transform,
+            warmup_uri=oss_uri, get_dataset_objects_without_preload=partial(OssBucketIterable.from_prefix, oss_uri, preload=False)
         )
 
     @classmethod
@@ -125,18 +138,58 @@ class OssIterableDataset(torch.utils.data.IterableDataset):
         log.info(f"Building {cls.__name__} from_manifest_file")
         return cls(
             endpoint, cred_path, config_path, partial(OssBucketIterable.from_manifest_file, manifest_file_path, manifest_parser, oss_base_uri, preload=True),
-            transform=transform
+            transform=transform, warmup_uri=oss_base_uri,
+            get_dataset_objects_without_preload=partial(OssBucketIterable.from_manifest_file, manifest_file_path, manifest_parser, oss_base_uri, preload=False)
         )
 
     def _get_client(self, id, total):
+        _mark_worker_start()
         if self._client is None:
             self._client = OssClient(self._endpoint, self._cred_path, self._config_path, self._uuid, id, total)
             log.info("OssIterableDataset new client")
+        else:
+            # client may be inherited from the main process or a previous worker
+            self._client._set_worker(id, total)
         return self._client
 
+    def _get_warmup_target(self) -> Tuple[OssClient, str, str]:
+        worker_info = torch.utils.data.get_worker_info()
+        id, total = (0, 1) if worker_info is None else (worker_info.id, worker_info.num_workers)
+        bucket, prefix = parse_oss_uri(self._warmup_uri) if self._warmup_uri else ("", "")
+        return self._get_client(id, total), bucket, prefix
+
+    def warmup(self) -> float:
+        """Builds the client of current process and issues a first request to OSS.
+
+        Called in the main process, it validates credentials, config and endpoint early.
+        Each DataLoader worker builds its own client, see `start_warmup`.
+
+        Returns:
+            float: Time cost of warm-up in seconds.
+        """
+        client, bucket, prefix = self._get_warmup_target()
+        return client.warmup(bucket, prefix)
+
+    def start_warmup(self):
+        """Runs `warmup` in a background thread, used by `warmup_worker_init_fn`."""
+        client, bucket, prefix = self._get_warmup_target()
+        client.start_warmup(bucket, prefix)
+
+    def _list_objects_without_preload(self, client: OssClient) -> Iterable[DataObject]:
+        if self._get_dataset_objects_without_preload is None:
+            raise ValueError("dataset must be created by from_prefix, from_objects or from_manifest_file to be listed without preload")
+        return self._get_dataset_objects_without_preload(client)
+
     def _get_transformed_object(self, object: DataObject) -> Any:
         return self._transform(object)
 
+    def _log_first_object(self, objects: Iterator[Any]) -> Iterator[Any]:
+        for object in objects:
+            _log_time_to_first_object("OssIterableDataset", self._client._warmup_cost)
+            yield object
+            break
+        yield from objects
+
     def __iter__(self) -> Iterator[Any]:
         worker_info = torch.utils.data.get_worker_info()
 
@@ -149,4 +202,4 @@ class OssIterableDataset(torch.utils.data.IterableDataset):
             log.info("OssIterableDataset get iter (multi-process), num_workers: %d, worker id: %d", num_workers, worker_id)
             worker_iter = self._get_dataset_objects(self._get_client(worker_id, num_workers))
 
-        return map(self._get_transformed_object, worker_iter)
+        return self._log_first_object(map(self._get_transformed_object, worker_iter))
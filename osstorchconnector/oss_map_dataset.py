@@ -10,6 +10,7 @@ import errno
 
 from ._oss_client import OssClient, DataObject
 from ._oss_bucket_iterable import OssBucketIterable, identity, parse_oss_uri
+from .oss_worker import _mark_worker_start, _log_time_to_first_object
 
 log = logging.getLogger(__name__)
 
@@ -144,6 +145,7 @@ class OssMapDataset(torch.utils.data.Dataset):
         )
 
     def _get_client(self):
+        _mark_worker_start()
         if self._client is None:
             self._client = OssClient(self._endpoint, self._cred_path, self._config_path, self._uuid)
             log.info("OssMapDataset new client")
@@ -151,11 +153,35 @@ class OssMapDataset(torch.utils.data.Dataset):
             worker_info = torch.utils.data.get_worker_info()
             if worker_info is not None:
                 # reset client id
-                self._client._id = worker_info.id
-                self._client._total = worker_info.num_workers
+                self._client._set_worker(worker_info.id, worker_info.num_workers)
             self._client_pid = os.getpid()
         return self._client
 
+    def _get_warmup_target(self) -> Tuple[OssClient, str, str]:
+        if not self._dataset_bucket_objects:
+            return self._get_client(), "", ""
+        bucket, key = parse_oss_uri(self._dataset_bucket_objects[0].key)
+        return self._get_client(), bucket, key
+
+    def warmup(self) -> float:
+        """Builds the client of current process and issues a first request to OSS.
+
+        Each DataLoader worker builds its own client, see `start_warmup`.
+
+        Returns:
+            float: Time cost of warm-up in seconds.
+        """
+        client, bucket, key = self._get_warmup_target()
+        return client.warmup(bucket, key)
+
+    def start_warmup(self):
+        """Runs `warmup` in a background thread, used by `warmup_worker_init_fn`.
+
+        The warm-up overlaps with the worker waiting for its first indices.
+        """
+        client, bucket, key = self._get_warmup_target()
+        client.start_warmup(bucket, key)
+
     def _get_transformed_object(self, i: int) -> Any:
         object = self._dataset_bucket_objects[i]
         log.debug("OssMapDataset get item [%d], key: %s, size: %d, label: %s", i, object.key, object.size, object.label)
@@ -178,14 +204,18 @@ class OssMapDataset(torch.utils.data.Dataset):
         return self._transform(object)
 
     def __getitem__(self, i: int) -> Any:
-        return self._get_transformed_object(i)
+        item = self._get_transformed_object(i)
+        _log_time_to_first_object("OssMapDataset", self._client._warmup_cost)
+        return item
 
     def __getitems__(self, indices: List[int]) -> List[Any]:
         log.debug("OssMapDataset get items %s", indices)
         objects = [self._dataset_bucket_objects[i] for i in indices]
         iter = self._get_client().list_objects_from_uris(objects, prefetch=True, include_errors=True)
         # should return list, default collate needs batch be subscriptable
-        return [self._get_transformed_object_safe(object) for object in iter]
+        items = [self._get_transformed_object_safe(object) for object in iter]
+        _log_time_to_first_object("OssMapDataset", self._client._warmup_cost)
+        return items
 
     def __len__(self):
         size = len(self._dataset_bucket_objects)
@@ -0,0 +1,257 @@
+from collections import deque
+from typing import Iterator, Any, List, Sequence, Tuple, Dict, Deque, Optional
+import torch.utils.data
+import uuid
+import logging
+import time
+import os
+import errno
+
+from ._oss_client import OssClient, DataObject
+from ._oss_connector import new_data_object
+from ._oss_bucket_iterable import parse_oss_uri
+from .oss_iterable_dataset import OssIterableDataset
+from .oss_worker import _mark_worker_start, _log_time_to_first_object
+
+log = logging.getLogger(__name__)
+
+class OssMixedIterableDataset(torch.utils.data.IterableDataset):
+    """An IterableStyle dataset mixing objects from several OSS sources with sampling weights.
+
+    Each source is an `OssIterableDataset` built by `from_prefix`, `from_objects` or
+    `from_manifest_file`, and may point to a different bucket or endpoint. Sources sharing
+    the same endpoint, cred_path and config_path share one client. The interleaved order
+    is planned from `seed`, the epoch and `weights`, and each client prefetches its objects
+    in that planned order, so every source is warm right before it is drawn.
+
+    Sources are drawn with replacement with probability proportional to their weights,
+    and the objects of each source are taken in listed order. `stopping_strategy` decides
+    when an epoch ends:
+
+    - "first_exhausted": stop as soon as any source runs out of objects (undersampling).
+    - "all_exhausted": restart exhausted sources from their first object and stop once every
+      source has been fully drawn at least once (oversampling).
+
+    In both cases each source's share of an epoch follows its weight.
+    """
+
+    STOPPING_STRATEGIES = ("first_exhausted", "all_exhausted")
+    _PLAN_CHUNK_SIZE = 16384
+
+    def __init__(
+        self,
+        datasets: Sequence[OssIterableDataset],
+        weights: Sequence[float],
+        *,
+        seed: int = 0,
+        stopping_strategy: str = "first_exhausted",
+    ):
+        self._uuid = uuid.uuid4()
+        log.info("OssMixedIterableDataset init, uuid: %s, sources: %d", self._uuid, len(datasets))
+        init_time = time.time()
+        if not datasets:
+            raise ValueError("datasets must be non-empty")
+        if len(weights) != len(datasets):
+            raise ValueError("weights must have the same length as datasets")
+        if any(weight < 0 for weight in weights) or sum(weights) <= 0:
+            raise ValueError("weights must be non-negative and sum to a positive value")
+        if stopping_strategy not in self.STOPPING_STRATEGIES:
+            raise ValueError("stopping_strategy must be one of %s" % (self.STOPPING_STRATEGIES,))
+        self._datasets = list(datasets)
+        self._weights = [float(weight) for weight in weights]
+        self._seed = seed
+        self._stopping_strategy = stopping_strategy
+        # shared memory, so that set_epoch in the main process reaches persistent workers
+        self._epoch = torch.zeros((), dtype=torch.int64).share_memory_()
+        self._clients: Dict[Tuple[str, str, str], OssClient] = {}
+        self._client_pid = os.getpid()
+        self._source_client_keys = [self._get_client_key(dataset) for dataset in self._datasets]
+        self._source_objects = [self._list_source_objects(i) for i in range(len(self._datasets))]
+        for i, objects in enumerate(self._source_objects):
+            if self._weights[i] > 0 and not objects:
+                raise ValueError("source [%d] with positive weight has no objects" % i)
+        log.info("OssMixedIterableDataset init done, uuid: %s, clients: %d, time cost: %.2f s",
+                 self._uuid, len(self._clients), time.time() - init_time)
+
+    @staticmethod
+    def _get_client_key(dataset: OssIterableDataset) -> Tuple[str, str, str]:
+        return (dataset._endpoint, dataset._cred_path, dataset._config_path)
+
+    def _list_source_objects(self, i: int) -> List[Tuple[str, int, str]]:
+        client = self._get_client(self._source_client_keys[i])
+        # objects are fetched in planned order by list_objects_from_uris, so list without preload;
+        # keep plain (key, size, label) tuples, native objects can not be pickled to spawned workers
+        objects = [(object.key, object.size, object.label)
+                   for object in self._datasets[i]._list_objects_without_preload(client)]
+        log.info("OssMixedIterableDataset source [%d] listed, objects: %d, weight: %f", i, len(objects), self._weights[i])
+        return objects
+
+    def _get_client(self, key: Tuple[str, str, str]) -> OssClient:
+        if key not in self._clients:
+            endpoint, cred_path, config_path = key
+            self._clients[key] = OssClient(endpoint, cred_path, config_path, self._uuid)
+            log.info("OssMixedIterableDataset new client, endpoint: %s", endpoint)
+        if self._client_pid != os.getpid():
+            worker_info = torch.utils.data.get_worker_info()
+            if worker_info is not None:
+                # reset client id
+                for client in self._clients.values():
+                    client._set_worker(worker_info.id, worker_info.num_workers)
+            self._client_pid = os.getpid()
+        return self._clients[key]
+
+    def _get_warmup_targets(self) -> List[Tuple[OssClient, str, str]]:
+        targets = []
+        for key in list(self._clients):
+            objects = next((self._source_objects[i] for i, k in enumerate(self._source_client_keys)
+                            if k == key and self._source_objects[i]), None)
+            bucket, prefix = parse_oss_uri(objects[0][0]) if objects else ("", "")
+            targets.append((self._get_client(key), bucket, prefix))
+        return targets
+
+    def warmup(self) -> float:
+        """Builds the clients of current process and issues a first request to OSS for each of them.
+
+        Each DataLoader worker builds its own clients, see `start_warmup`.
+
+        Returns:
+            float: Time cost of warm-up in seconds.
+        """
+        return sum(client.warmup(bucket, prefix) for client, bucket, prefix in self._get_warmup_targets())
+
+    def start_warmup(self):
+        """Runs `warmup` of each client in a background thread, used by `warmup_worker_init_fn`.
+
+        The warm-up overlaps with planning the first objects of the epoch.
+        """
+        for client, bucket, prefix in self._get_warmup_targets():
+            client.start_warmup(bucket, prefix)
+
+    def _get_warmup_cost(self) -> Optional[float]:
+        costs = [client._warmup_cost for client in self._clients.values() if client._warmup_cost is not None]
+        return sum(costs) if costs else None
+
+    def set_epoch(self, epoch: int):
+        """Sets the epoch used together with `seed` to plan the interleaved order.
+
+        Call it in the main process before each epoch, otherwise every epoch draws the same mix.
+        The epoch is kept in shared memory, so it also reaches DataLoader workers created before
+        the call, e.g. with `persistent_workers=True`.
+
+        Args:
+          epoch(int): Epoch number.
+        """
+        self._epoch.fill_(epoch)
+
+    def _plan(self, epoch: int) -> Iterator[Tuple[torch.Tensor, torch.Tensor]]:
+        """Yields the global interleaved order in chunks of source indices and object indices.
+
+        Each chunk of `_PLAN_CHUNK_SIZE` draws is made with `torch.multinomial`, and the object
+        index of a draw is the number of earlier draws of its source, computed for the whole
+        chunk with one stable sort. Planning is lazy and its cost does not grow with the number
+        of sources.
+        """
+        generator = torch.Generator()
+        generator.manual_seed(self._seed + epoch)
+        weights = torch.tensor(self._weights, dtype=torch.float64)
+        sizes = torch.tensor([len(objects) for objects in self._source_objects], dtype=torch.int64)
+        counts = torch.zeros_like(sizes)
+        exhausted = weights == 0    # sources never drawn are treated as exhausted
+        while True:
+            sources = torch.multinomial(weights, self._PLAN_CHUNK_SIZE, replacement=True, generator=generator)
+            chunk_counts = torch.bincount(sources, minlength=len(sizes))
+            # rank of each draw among the draws of its source in this chunk
+            order = torch.sort(sources, stable=True).indices
+            starts = torch.cumsum(chunk_counts, 0) - chunk_counts
+            ranks = torch.empty_like(sources)
+            ranks[order] = torch.arange(len(sources)) - starts[sources[order]]
+            positions = counts[sources] + ranks
+            counts += chunk_counts
+            source_sizes = sizes[sources]
+            if self._stopping_strategy == "first_exhausted":
+                past_end = (positions >= source_sizes).nonzero()
+                if len(past_end) > 0:
+                    # stop before the first draw past the end of its source
+                    cut = int(past_end[0])
+                    yield sources[:cut], positions[:cut]
+                    return
+            else:
+                # the last object of a source is drawn exactly once before the source restarts
+                finished = (positions == source_sizes - 1) & ~exhausted[sources]
+                exhausted[sources[finished]] = True
+                positions = positions % source_sizes
+                if exhausted.all():
+                    # stop after the draw of the last object of the last exhausted source
+                    cut = int(finished.nonzero()[-1]) + 1
+                    yield sources[:cut], positions[:cut]
+                    return
+            yield sources, positions
+
+    def _worker_windows(self, epoch: int, worker_id: int, num_workers: int) -> Iterator[Tuple[List[int], List[int]]]:
+        # the draws of the global plan are split among workers in round-robin
+        offset = 0
+        for sources, positions in self._plan(epoch):
+            start = (worker_id - offset) % num_workers
+            offset += len(sources)
+            if start < len(sources):
+                yield sources[start::num_workers].tolist(), positions[start::num_workers].tolist()
+
+    def _get_transformed_object_safe(self, i: int, object: DataObject) -> Any:
+        transform = self._datasets[i]._transform
+        eno = object.err()
+        if eno != 0:
+            errstr = "failed to get next object, errno=%d(%s), msg=%s" % (eno, os.strerror(eno), object.error_msg())
+            log.error("OssMixedIterableDataset get item %s faild: %s", object.key, errstr)
+            if eno == errno.ENOENT:
+                return transform(None)
+            else:
+                raise RuntimeError(errstr)
+        return transform(object)
+
+    def _open_window(self, sources: List[int], positions: List[int]):
+        # one prefetch stream per client, fed with its objects of the window in planned order
+        client_objects: Dict[Tuple[str, str, str], List[DataObject]] = {}
+        # prefetch may reorder objects locally, so the source is looked up by the returned key
+        client_sources: Dict[Tuple[str, str, str], Dict[str, Deque[int]]] = {}
+        for i, j in zip(sources, positions):
+            key = self._source_client_keys[i]
+            object_key, size, label = self._source_objects[i][j]
+            client_objects.setdefault(key, []).append(new_data_object(object_key, size, label))
+            client_sources.setdefault(key, {}).setdefault(object_key, deque()).append(i)
+        client_iters = {
+            key: iter(self._get_client(key).list_objects_from_uris(objects, prefetch=True, include_errors=True))
+            for key, objects in client_objects.items()
+        }
+        return sources, client_iters, client_sources
+
+    def _iter_plan(self, windows: Iterator[Tuple[List[int], List[int]]]) -> Iterator[Any]:
+        windows = (self._open_window(sources, positions) for sources, positions in windows)
+        next_window = next(windows, None)
+        first = True
+        while next_window is not None:
+            sources, client_iters, client_sources = next_window
+            # open the following window before draining this one, so that its prefetch starts early
+            next_window = next(windows, None)
+            for i in sources:
+                key = self._source_client_keys[i]
+                object = next(client_iters[key])
+                if first:
+                    _log_time_to_first_object("OssMixedIterableDataset", self._get_warmup_cost())
+                    first = False
+                yield self._get_transformed_object_safe(client_sources[key][object.key].popleft(), object)
+
+    def __iter__(self) -> Iterator[Any]:
+        _mark_worker_start()
+        worker_info = torch.utils.data.get_worker_info()
+        epoch = int(self._epoch)
+
+        if worker_info is None:     # single-process data loading, return the full iterator
+            worker_id, num_workers = 0, 1
+            log.info("OssMixedIterableDataset get iter (single-process), epoch: %d", epoch)
+        else:                       # in a worker process, split the planned order
+            num_workers = worker_info.num_workers
+            worker_id = worker_info.id
+            log.info("OssMixedIterableDataset get iter (multi-process), num_workers: %d, worker id: %d, epoch: %d",
+                     num_workers, worker_id, epoch)
+
+        return self._iter_plan(self._worker_windows(epoch, worker_id, num_workers))
@@ -0,0 +1,48 @@
+from typing import Optional
+import torch.utils.data
+import logging
+import time
+import os
+
+log = logging.getLogger(__name__)
+
+# start time of current process, recorded by `warmup_worker_init_fn` or on first use of a dataset
+_start_pid = None
+_start_time = None
+_first_object_pid = None
+
+def _mark_worker_start():
+    global _start_pid, _start_time
+    if _start_pid != os.getpid():
+        _start_pid = os.getpid()
+        _start_time = time.time()
+
+def _log_time_to_first_object(name: str, warmup_cost: Optional[float]):
+    global _first_object_pid
+    if _first_object_pid == os.getpid():
+        return
+    _first_object_pid = os.getpid()
+    _mark_worker_start()
+    worker_info = torch.utils.data.get_worker_info()
+    worker_id = 0 if worker_info is None else worker_info.id
+    log.info("%s worker %d first object, warmup: %s, time to first object: %.2f s", name, worker_id,
+             "none" if warmup_cost is None else "%.2f s" % warmup_cost, time.time() - _start_time)
+
+def warmup_worker_init_fn(worker_id: int):
+    """A `worker_init_fn` for DataLoader which warms up the OSS dataset in each worker.
+
+    The dataset's client is built and a first request to OSS is issued in a background
+    thread, overlapping with the rest of the worker's startup until the client is first
+    used. The time from worker start to the first object is logged together with the
+    warm-up time. If a custom `worker_init_fn` is needed, call `start_warmup()` of the
+    dataset in it instead.
+
+    Args:
+      worker_id(int): Id of the DataLoader worker.
+    """
+    _mark_worker_start()
+    dataset = torch.utils.data.get_worker_info().dataset
+    if not hasattr(dataset, "start_warmup"):
+        log.warning("warmup_worker_init_fn: %s does not support warmup", type(dataset).__name__)
+        return
+    dataset.start_warmup()
@@ -0,0 +1,121 @@
+"""In-memory stand-in for the native `oss_connector` module used by the tests.
+
+Buckets are plain dicts in `BUCKETS` mapping object keys to contents. Every native dataset
+built by `new_oss_dataset` is recorded in `DATASETS` together with the calls made on it.
+`list_from_uris` swaps each pair of adjacent objects to mimic prefetch reordering objects locally.
+"""
+import errno
+from typing import Dict, Iterable, Iterator, List
+
+BUCKETS: Dict[str, Dict[str, bytes]] = {}
+DATASETS: List["DataSet"] = []
+
+
+def reset():
+    BUCKETS.clear()
+    DATASETS.clear()
+
+
+def _split(uri: str):
+    bucket, _, key = uri[len("oss://"):].partition("/")
+    return bucket, key
+
+
+class DataObject:
+    def __init__(self, key: str, size: int = 0, label: str = "", preloaded: bool = False):
+        self.key = key
+        self.size = size
+        self.label = label
+        self.preloaded = preloaded
+        self._data = None
+        self._err = 0
+
+    def _load(self):
+        bucket, key = _split(self.key)
+        objects = BUCKETS.get(bucket, {})
+        if key in objects:
+            self._data = objects[key]
+            self.size = len(self._data)
+        else:
+            self._err = errno.ENOENT
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def read(self, count: int = -1) -> bytes:
+        return self._data
+
+    def close(self) -> int:
+        return 0
+
+    def err(self) -> int:
+        return self._err
+
+    def error_msg(self) -> str:
+        return "not found" if self._err else ""
+
+    def copy(self) -> "DataObject":
+        object = DataObject(self.key, self.size, self.label, self.preloaded)
+        object._data = self._data
+        object._err = self._err
+        return object
+
+
+class DataSet:
+    def __init__(self, endpoint: str, cred_path: str, config_path: str, uuid: str, id: int, total: int):
+        self.endpoint = endpoint
+        self.cred_path = cred_path
+        self.config_path = config_path
+        self.uuid = uuid
+        self.id = id
+        self.total = total
+        self.calls = []
+
+    def _list(self, bucket: str, prefix: str, preload: bool) -> Iterator[DataObject]:
+        for key in sorted(BUCKETS.get(bucket, {})):
+            if key.startswith(prefix):
+                yield DataObject("oss://%s/%s" % (bucket, key), len(BUCKETS[bucket][key]), "", preload)
+
+    def list(self, bucket: str, prefix: str) -> Iterator[DataObject]:
+        self.calls.append(("list", bucket, prefix))
+        return self._list(bucket, prefix, False)
+
+    def list_with_preload(self, bucket: str, prefix: str) -> Iterator[DataObject]:
+        self.calls.append(("list_with_preload", bucket, prefix))
+        return self._list(bucket, prefix, True)
+
+    def list_from_uris(self, iter: Iterable, prefetch: bool, include_errors: bool) -> Iterator[DataObject]:
+        self.calls.append(("list_from_uris", prefetch, include_errors))
+        pending = []
+        for object in iter:
+            pending.append(object.copy()._load())
+            if len(pending) == 2:
+                yield pending[1]
+                yield pending[0]
+                pending = []
+        yield from pending
+
+    def list_from_uris_with_preload(self, iter: Iterable) -> Iterator[DataObject]:
+        self.calls.append(("list_from_uris_with_preload",))
+        for object in iter:
+            object = object.copy()._load()
+            object.preloaded = True
+            yield object
+
+    def open_ro(self, bucket: str, key: str, size: int, mmap: int, label: str) -> DataObject:
+        self.calls.append(("open_ro", bucket, key))
+        return DataObject("oss://%s/%s" % (bucket, key), size, label)._load()
+
+
+def new_oss_dataset(endpoint: str, cred_path: str, config_path: str, uuid: str, id: int, total: int) -> DataSet:
+    dataset = DataSet(endpoint, cred_path, config_path, uuid, id, total)
+    DATASETS.append(dataset)
+    return dataset
+
+
+def new_data_object(key: str, size: int, label: str) -> DataObject:
+    return DataObject(key, size, label)
@@ -0,0 +1,63 @@
+import pickle
+
+import pytest
+
+from osstorchconnector import _oss_client
+from osstorchconnector._oss_client import OssClient
+
+ENDPOINT = "http://oss.example.com"
+
+
+def test_set_worker_rebuilds_client_with_new_id(oss):
+    client = OssClient(ENDPOINT)
+    client.list_objects("bucket", "")
+    client._set_worker(0, 1)
+    client.list_objects("bucket", "")
+    assert [(native.id, native.total) for native in oss.DATASETS] == [(0, 1)]
+    client._set_worker(2, 4)
+    client.list_objects("bucket", "")
+    assert [(native.id, native.total) for native in oss.DATASETS] == [(0, 1), (2, 4)]
+
+
+def test_pickle_drops_native_handle(oss):
+    client = OssClient(ENDPOINT, "cred", "config", "uuid", 1, 2)
+    client.warmup()
+    copied = pickle.loads(pickle.dumps(client))
+    assert copied._real_client is None
+    assert copied._client_pid is None
+    assert copied._warmup_cost is None
+    assert (copied._endpoint, copied._cred_path, copied._config_path, copied._id, copied._total) == \
+        (ENDPOINT, "cred", "config", 1, 2)
+    copied.list_objects("bucket", "")
+    assert len(oss.DATASETS) == 2
+
+
+def test_warmup_lists_one_object(oss):
+    oss.BUCKETS["bucket"] = {"x/000": b"0"}
+    client = OssClient(ENDPOINT)
+    cost = client.warmup("bucket", "x/")
+    assert oss.DATASETS[0].calls == [("list", "bucket", "x/")]
+    assert client._warmup_cost == cost
+    # a client rebuilt in another process is not warmed up
+    client._client_pid = -1
+    client.list_objects("bucket", "")
+    assert client._warmup_cost is None
+
+
+def test_start_warmup_is_joined_on_first_use(oss):
+    client = OssClient(ENDPOINT)
+    client.start_warmup()
+    client.list_objects("bucket", "")
+    assert client._warmup_thread is None
+    assert client._warmup_cost is not None
+    assert len(oss.DATASETS) == 1
+
+
+def test_failed_background_warmup_raises_on_first_use(oss, monkeypatch):
+    def fail(*args):
+        raise RuntimeError("bad credentials")
+    monkeypatch.setattr(_oss_client, "new_oss_dataset", fail)
+    client = OssClient(ENDPOINT)
+    client.start_warmup()
+    with pytest.raises(RuntimeError):
+        client.list_objects("bucket", "")
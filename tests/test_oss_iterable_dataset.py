@@ -0,0 +1,103 @@
+import io
+import logging
+from types import SimpleNamespace
+
+import pytest
+import torch
+
+from osstorchconnector import OssIterableDataset, OssMapDataset, OssMixedIterableDataset, oss_worker, warmup_worker_init_fn
+
+ENDPOINT = "http://oss.example.com"
+
+
+@pytest.fixture(autouse=True)
+def reset_worker_start(monkeypatch):
+    monkeypatch.setattr(oss_worker, "_start_pid", None)
+    monkeypatch.setattr(oss_worker, "_first_object_pid", None)
+
+
+def _fill_bucket(oss):
+    oss.BUCKETS["bucket"] = {"x/%03d" % i: b"x%d" % i for i in range(10)}
+
+
+def _key(object):
+    return object.key
+
+
+def _parser(reader: io.IOBase):
+    for line in reader.read().decode("utf-8").split():
+        yield line, ""
+
+
+def test_warmup_uri(tmp_path):
+    assert OssIterableDataset.from_prefix("oss://bucket/x/", ENDPOINT)._warmup_uri == "oss://bucket/x/"
+    assert OssIterableDataset.from_objects("oss://bucket/x/000", ENDPOINT)._warmup_uri == "oss://bucket/x/000"
+    uris = ["oss://bucket/x/001", "oss://bucket/x/002"]
+    assert OssIterableDataset.from_objects(uris, ENDPOINT)._warmup_uri == "oss://bucket/x/001"
+    # a generator is not consumed to find its first uri
+    assert OssIterableDataset.from_objects(iter(uris), ENDPOINT)._warmup_uri == ""
+    manifest = tmp_path / "manifest"
+    manifest.write_text("x/000\n")
+    dataset = OssIterableDataset.from_manifest_file(str(manifest), _parser, "oss://bucket/", ENDPOINT)
+    assert dataset._warmup_uri == "oss://bucket/"
+
+
+def test_warmup_lists_warmup_uri(oss):
+    _fill_bucket(oss)
+    dataset = OssIterableDataset.from_prefix("oss://bucket/x/", ENDPOINT)
+    assert dataset.warmup() == dataset._client._warmup_cost
+    assert oss.DATASETS[0].calls == [("list", "bucket", "x/")]
+
+
+def test_client_id_is_reset_in_worker(oss, monkeypatch):
+    _fill_bucket(oss)
+    dataset = OssIterableDataset.from_prefix("oss://bucket/x/", ENDPOINT, transform=_key)
+    list(dataset)
+    monkeypatch.setattr(torch.utils.data, "get_worker_info", lambda: SimpleNamespace(id=1, num_workers=2))
+    list(dataset)
+    assert [(native.id, native.total) for native in oss.DATASETS] == [(0, 1), (1, 2)]
+
+
+def test_log_first_object(oss, caplog):
+    dataset = OssIterableDataset.from_prefix("oss://bucket/x/", ENDPOINT)
+    dataset._get_client(0, 1)
+    with caplog.at_level(logging.INFO, logger=oss_worker.__name__):
+        assert list(dataset._log_first_object(iter([]))) == []
+        assert not caplog.records
+        assert list(dataset._log_first_object(iter([1, 2, 3]))) == [1, 2, 3]
+        assert list(dataset._log_first_object(iter([4, 5]))) == [4, 5]
+    # logged once per process
+    assert len(caplog.records) == 1
+    assert "time to first object" in caplog.records[0].getMessage()
+
+
+def test_warmup_worker_init_fn_logs_warmup_and_time_to_first_object(oss, monkeypatch, caplog):
+    _fill_bucket(oss)
+    dataset = OssIterableDataset.from_prefix("oss://bucket/x/", ENDPOINT, transform=_key)
+    worker_info = SimpleNamespace(id=0, num_workers=1, dataset=dataset)
+    monkeypatch.setattr(torch.utils.data, "get_worker_info", lambda: worker_info)
+    with caplog.at_level(logging.INFO, logger=oss_worker.__name__):
+        warmup_worker_init_fn(0)
+        assert len(list(dataset)) == 10
+    message = caplog.records[0].getMessage()
+    assert "warmup: none" not in message
+    assert "time to first object" in message
+
+
+def test_dataloader_with_warmup_worker_init_fn(oss):
+    _fill_bucket(oss)
+    keys = ["oss://bucket/x/%03d" % i for i in range(10)]
+    datasets = [
+        OssIterableDataset.from_objects(keys, ENDPOINT, transform=_key),
+        OssMapDataset.from_prefix("oss://bucket/x/", ENDPOINT, transform=_key),
+        OssMixedIterableDataset([OssIterableDataset.from_prefix("oss://bucket/x/", ENDPOINT, transform=_key)], [1],
+                                stopping_strategy="all_exhausted"),
+    ]
+    for dataset in datasets:
+        loader = torch.utils.data.DataLoader(dataset, batch_size=None, num_workers=2, multiprocessing_context="fork",
+                                             worker_init_fn=warmup_worker_init_fn)
+        items = list(loader)
+        if isinstance(dataset, OssIterableDataset):
+            # the fake native list_from_uris_with_preload does not split objects among workers
+            items = sorted(set(items))
+        assert sorted(items) == keys
@@ -0,0 +1,196 @@
+import pickle
+from collections import Counter
+from functools import partial
+
+import pytest
+import torch
+
+from osstorchconnector import OssMixedIterableDataset
+
+
+def _new_dataset(sizes, weights, seed=0, stopping_strategy="first_exhausted"):
+    # bypass __init__, which lists the sources on OSS
+    dataset = OssMixedIterableDataset.__new__(OssMixedIterableDataset)
+    dataset._weights = [float(weight) for weight in weights]
+    dataset._seed = seed
+    dataset._stopping_strategy = stopping_strategy
+    dataset._epoch = torch.zeros((), dtype=torch.int64).share_memory_()
+    dataset._source_objects = [[None] * size for size in sizes]
+    dataset._iter_plan = lambda windows: (
+        object for sources, positions in windows for object in zip(sources, positions))
+    return dataset
+
+
+def _plan(dataset, epoch):
+    return [(source, position) for sources, positions in dataset._plan(epoch)
+            for source, position in zip(sources.tolist(), positions.tolist())]
+
+
+def test_plan_is_deterministic():
+    dataset = _new_dataset([50, 80, 30], [0.2, 0.5, 0.3], seed=7)
+    assert _plan(dataset, 3) == _plan(dataset, 3)
+    assert _plan(dataset, 3) != _plan(dataset, 4)
+    assert _plan(dataset, 3) != _plan(_new_dataset([50, 80, 30], [0.2, 0.5, 0.3], seed=8), 3)
+
+
+def test_plan_first_exhausted():
+    sizes = [50, 80, 30]
+    plan = _plan(_new_dataset(sizes, [0.2, 0.5, 0.3]), 0)
+    counts = Counter(source for source, _ in plan)
+    for source, size in enumerate(sizes):
+        positions = [position for s, position in plan if s == source]
+        assert positions == list(range(counts[source]))
+        assert counts[source] <= size
+    assert any(counts[source] == size for source, size in enumerate(sizes))
+
+
+def test_plan_all_exhausted():
+    sizes = [50, 80, 30]
+    plan = _plan(_new_dataset(sizes, [0.2, 0.5, 0.3], stopping_strategy="all_exhausted"), 0)
+    counts = Counter(source for source, _ in plan)
+    for source, size in enumerate(sizes):
+        positions = [position for s, position in plan if s == source]
+        assert positions == [i % size for i in range(counts[source])]
+        assert counts[source] >= size
+    # the epoch ends with the draw that exhausts the last source
+    last_source, last_position = plan[-1]
+    assert last_position == sizes[last_source] - 1
+    assert counts[last_source] == sizes[last_source]
+
+
+def test_plan_follows_weights():
+    plan = _plan(_new_dataset([100000, 100000], [0.25, 0.75]), 0)
+    counts = Counter(source for source, _ in plan)
+    assert counts[1] == 100000
+    assert counts[0] / len(plan) == pytest.approx(0.25, abs=0.01)
+
+
+def test_plan_skips_zero_weight_sources():
+    plan = _plan(_new_dataset([10, 10, 10], [1, 0, 1], stopping_strategy="all_exhausted"), 0)
+    assert 1 not in {source for source, _ in plan}
+
+
+def test_iter_uses_epoch_set_by_set_epoch():
+    dataset = _new_dataset([50, 80, 30], [0.2, 0.5, 0.3])
+    assert list(iter(dataset)) == _plan(dataset, 0)
+    assert list(iter(dataset)) == _plan(dataset, 0)
+    dataset.set_epoch(5)
+    assert list(iter(dataset)) == _plan(dataset, 5)
+    assert list(iter(dataset)) == _plan(dataset, 5)
+
+
+@pytest.mark.parametrize("num_workers", [1, 3, 4])
+def test_worker_windows_split_plan_round_robin(monkeypatch, num_workers):
+    monkeypatch.setattr(OssMixedIterableDataset, "_PLAN_CHUNK_SIZE", 10)
+    dataset = _new_dataset([50, 80, 30], [0.2, 0.5, 0.3], stopping_strategy="all_exhausted")
+    plan = _plan(dataset, 0)
+    for worker_id in range(num_workers):
+        windows = list(dataset._worker_windows(0, worker_id, num_workers))
+        assert all(len(sources) <= 10 for sources, _ in windows)
+        worker_plan = [object for sources, positions in windows for object in zip(sources, positions)]
+        assert worker_plan == plan[worker_id::num_workers]
+
+
+ENDPOINT_A = "http://oss-a.example.com"
+ENDPOINT_B = "http://oss-b.example.com"
+
+
+def _tag(tag, object):
+    return tag, object.key, object.read()
+
+
+def _fill_buckets(oss):
+    oss.BUCKETS["bucket-a"] = {}
+    oss.BUCKETS["bucket-a"].update({"x/%03d" % i: b"x%d" % i for i in range(20)})
+    oss.BUCKETS["bucket-a"].update({"y/%03d" % i: b"y%d" % i for i in range(30)})
+    oss.BUCKETS["bucket-b"] = {"z/%03d" % i: b"z%d" % i for i in range(10)}
+
+
+def _sources():
+    from osstorchconnector import OssIterableDataset
+    return [
+        OssIterableDataset.from_prefix("oss://bucket-a/x/", ENDPOINT_A, transform=partial(_tag, "x")),
+        OssIterableDataset.from_prefix("oss://bucket-a/y/", ENDPOINT_A, transform=partial(_tag, "y")),
+        OssIterableDataset.from_objects(["oss://bucket-b/z/%03d" % i for i in range(10)], ENDPOINT_B,
+                                        transform=partial(_tag, "z")),
+    ]
+
+
+@pytest.mark.parametrize("persistent_workers", [False, True])
+def test_set_epoch_reaches_dataloader_workers(oss, persistent_workers):
+    _fill_buckets(oss)
+    dataset = OssMixedIterableDataset(_sources(), [1, 2, 1], seed=3)
+    expected = []
+    for epoch in range(2):
+        dataset.set_epoch(epoch)
+        expected.append(sorted(dataset))
+    # first_exhausted ends each epoch at a different point, so the drawn objects differ
+    assert expected[0] != expected[1]
+
+    loader = torch.utils.data.DataLoader(dataset, batch_size=None, num_workers=2, persistent_workers=persistent_workers,
+                                         multiprocessing_context="fork")
+    for epoch in range(2):
+        dataset.set_epoch(epoch)
+        assert sorted(tuple(item) for item in loader) == expected[epoch]
+
+
+def test_sources_listed_without_preload_and_clients_shared(oss):
+    _fill_buckets(oss)
+    dataset = OssMixedIterableDataset(_sources(), [1, 1, 1])
+    # one client per (endpoint, cred_path, config_path)
+    assert sorted(dataset._clients) == [(ENDPOINT_A, "", ""), (ENDPOINT_B, "", "")]
+    list(dataset)
+    assert sorted(native.endpoint for native in oss.DATASETS) == [ENDPOINT_A, ENDPOINT_B]
+    calls = [call for dataset in oss.DATASETS for call in dataset.calls]
+    assert ("list", "bucket-a", "x/") in calls
+    assert ("list", "bucket-a", "y/") in calls
+    assert not [call for call in calls if "preload" in call[0]]
+
+
+@pytest.mark.parametrize("stopping_strategy", ["first_exhausted", "all_exhausted"])
+def test_iter_dispatches_reordered_objects_to_their_source(oss, stopping_strategy):
+    _fill_buckets(oss)
+    dataset = OssMixedIterableDataset(_sources(), [1, 2, 1], seed=5, stopping_strategy=stopping_strategy)
+    items = list(dataset)
+    prefix = {"x": "oss://bucket-a/x/", "y": "oss://bucket-a/y/", "z": "oss://bucket-b/z/"}
+    for tag, key, data in items:
+        assert key.startswith(prefix[tag])
+        assert data == tag.encode() + str(int(key[-3:])).encode()
+    # the fake prefetch swaps neighbours, so objects of both sources on endpoint A
+    # come back out of planned order and must still get their own transform
+    plan = _plan(dataset, 0)
+    planned_tags = ["xyz"[source] for source, _ in plan]
+    assert [tag for tag, _, _ in items] != planned_tags
+    assert sorted(tag for tag, _, _ in items) == sorted(planned_tags)
+
+
+def test_init_validates_arguments(oss):
+    from osstorchconnector import OssIterableDataset
+    _fill_buckets(oss)
+    with pytest.raises(ValueError):
+        OssMixedIterableDataset([], [])
+    with pytest.raises(ValueError):
+        OssMixedIterableDataset(_sources(), [1, 1])
+    with pytest.raises(ValueError):
+        OssMixedIterableDataset(_sources(), [1, -1, 1])
+    with pytest.raises(ValueError):
+        OssMixedIterableDataset(_sources(), [0, 0, 0])
+    with pytest.raises(ValueError):
+        OssMixedIterableDataset(_sources(), [1, 1, 1], stopping_strategy="never")
+    empty = OssIterableDataset.from_prefix("oss://bucket-a/empty/", ENDPOINT_A)
+    with pytest.raises(ValueError):
+        OssMixedIterableDataset([empty], [1])
+    OssMixedIterableDataset([empty] + _sources(), [0, 1, 1, 1])
+    custom = OssIterableDataset(ENDPOINT_A, "", "", lambda client: iter([]))
+    with pytest.raises(ValueError):
+        OssMixedIterableDataset([custom], [1])
+
+
+def test_pickle_keeps_listed_objects_without_native_handles(oss):
+    _fill_buckets(oss)
+    dataset = OssMixedIterableDataset(_sources(), [1, 2, 1], seed=5)
+    dataset.warmup()
+    copied = pickle.loads(pickle.dumps(dataset))
+    assert all(client._real_client is None for client in copied._clients.values())
+    assert copied._source_objects == dataset._source_objects
+    assert sorted(copied) == sorted(dataset)